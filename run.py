@@ -2,10 +2,16 @@
 
 import pygame
 import argparse
+from pygame.locals import KEYDOWN, QUIT, VIDEOEXPOSE, WINDOWEXPOSED
 
 from threeBodyProblem.simulation import Simulation
 from threeBodyProblem.simulation_params import SimulationParams
-from threeBodyProblem.constants import PYGAME_CONSTANTS, COLORS
+from threeBodyProblem.constants import PYGAME_CONSTANTS, FPS, BACKGROUND_COLOR
+
+# The window needs repainting after these, as only the changed areas of the
+# simulations are sent to the display
+_EXPOSE_EVENTS = (WINDOWEXPOSED, VIDEOEXPOSE)
+_HANDLED_EVENTS = (QUIT, KEYDOWN) + _EXPOSE_EVENTS
 
 
 class SimulationManager:
@@ -22,6 +28,7 @@ class SimulationManager:
         self._init_pygame()
         self._init_enviroment()
         self._init_simulations(self._parse_input_args(input_args))
+        self._init_event_callbacks()
 
     def _parse_input_args(self, args):
         args = [arg for arg in vars(args).values() if arg is not None]
@@ -46,10 +53,15 @@ class SimulationManager:
         """
         pygame.init()
         pygame.display.set_caption(PYGAME_CONSTANTS.WINDOW_TITLE)
+        # A plain window, as one presented through a renderer (SCALED, which
+        # vsync needs) uploads all of it on every update, not the dirty rects
         self._win = pygame.display.set_mode(
             (PYGAME_CONSTANTS.WIDTH, PYGAME_CONSTANTS.HEIGHT)
         )
         self._clock = pygame.time.Clock()
+        # Only the handled events are queued, the rest never reach Python
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(_HANDLED_EVENTS)
 
     def _init_enviroment(self) -> None:
         """
@@ -62,26 +74,41 @@ class SimulationManager:
         """
         Initializes the simulations.
         """
+        # A single opaque simulation draws straight on the window, otherwise
+        # the simulations are translucent layers composed on the window
+        self._compose_layers = not (
+            len(simulation_params) == 1 and simulation_params[0].alpha == 255
+        )
         self._simulations = [
-            Simulation(self._win, self._clock, params) for params in simulation_params
+            Simulation(
+                self._win,
+                self._clock,
+                params,
+                draw_on_window=not self._compose_layers,
+            )
+            for params in simulation_params
         ]
 
     def _handle_events(self) -> None:
         """
         Handles all events.
         """
+        if not pygame.event.peek(_HANDLED_EVENTS):
+            # Nothing to handle, skip building the list of events
+            return
         for event in pygame.event.get():
-            self._event_callbacks.get(event.type, lambda _: None)(event)
+            event_type = event.type
+            if event_type == QUIT:
+                self._handle_stop(event)
+            elif event_type == KEYDOWN:
+                self._handle_key_down(event)
+            elif event_type in _EXPOSE_EVENTS:
+                self._handle_expose(event)
 
     def _init_event_callbacks(self) -> None:
         """
-        Initializes pygame callbacks.
+        Initializes pygame key callbacks, once, as bound methods.
         """
-        self._event_callbacks = {
-            pygame.QUIT: lambda event: self._handle_stop(event),
-            pygame.KEYDOWN: lambda event: self._handle_key_down(event),
-        }
-
         self._key_callbacks = {
             pygame.K_v: self._handle_show_vectors,
             pygame.K_t: self._handle_switch_draw_trails,
@@ -97,11 +124,20 @@ class SimulationManager:
         """
         self._run = False
 
+    def _handle_expose(self, _: pygame.event.Event) -> None:
+        """
+        Handles window expose event, redrawing the whole window.
+        """
+        for simulation in self._simulations:
+            simulation.redraw()
+
     def _handle_key_down(self, event: pygame.event.Event) -> None:
         """
         Handles key down event.
         """
-        self._key_callbacks.get(event.key, lambda: None)()
+        handler = self._key_callbacks.get(event.key)
+        if handler is not None:
+            handler()
 
     # ================== KEY CALLBACKS ================== #
 
@@ -139,14 +175,25 @@ class SimulationManager:
         """
         Runs the simulations.
         """
-        self._init_event_callbacks()
         while self._run:
-            self._clock.tick(PYGAME_CONSTANTS.FPS)
-            self._win.fill(COLORS.BACKGROUND_COLOR)
+            # Sleeps till the end of the frame. Oversleeping only delays the
+            # frame, the fixed time step keeps the simulation's pace.
+            self._clock.tick(FPS)
+            for simulation in self._simulations:
+                simulation.step_physics()
+            # Drawing shares the window, so it happens after all steps
+            dirty_rects = []
             for simulation in self._simulations:
-                simulation.run()
+                dirty_rects += simulation.draw()
+            if self._compose_layers:
+                # The simulations are translucent layers, so every changed
+                # area is recomposed from the background up
+                for rect in dirty_rects:
+                    self._win.fill(BACKGROUND_COLOR, rect)
+                    for simulation in self._simulations:
+                        simulation.blit(rect)
             self._handle_events()
-            pygame.display.flip()
+            pygame.display.update(dirty_rects)
 
 
 if __name__ == "__main__":
@@ -23,7 +23,8 @@ class PYGAME_CONSTANTS:
     VECTOR_LENGTH_MULTI: int = 35
 
     BODY_TRAIL_LENGTH: int = 1000
-    BODY_TRAIL_DROPOFF_TRESHOLD: float = 0.5  # when to start the fadeout
+    # frames between lowering the trails' alpha by one
+    BODY_TRAIL_FADE_INTERVAL: int = round(BODY_TRAIL_LENGTH / 255)
 
     MAX_SIMULATIONS: int = 2
 
@@ -62,7 +63,44 @@ class PHYSICS_CONSTANTS:
     DEFAULT_BODY_MASS: int = 1000
     DEFAULT_BODY_DISTANCE: float = PYGAME_CONSTANTS.WIDTH / 3
     DEFAULT_BODY_VELOCITY_FACTOR: float = 0.003
+    SQRT3_OVER_2: float = 3.0**0.5 * 0.5  # equilateral triangle's height ratio
+
+    # Time constants
+    TIME_STEP: float = 1.0  # default simulated time of a single physics step
+    STEPS_PER_SECOND: int = 120  # physics steps per real second, at TIME_STEP
+    MAX_FRAME_TIME: float = 0.25  # most real seconds simulated in a frame
+
+    # Barnes-Hut constants
+    BARNES_HUT_THETA: float = 0.5
+    BARNES_HUT_MIN_BODIES: int = 10000  # below that, direct sum is faster
+    BARNES_HUT_MAX_DEPTH: int = 32
 
     # Vector constants
     VELOCITY_LOSS_FACTOR: float = 0.9
     SPAWN_VECTOR_DIVIDER: int = 50
+
+
+# Module-level aliases of the constants read every frame, so that the loops
+# load them as plain globals, and the compiled kernels freeze them in.
+WIDTH: int = PYGAME_CONSTANTS.WIDTH
+HEIGHT: int = PYGAME_CONSTANTS.HEIGHT
+FPS: int = PYGAME_CONSTANTS.FPS
+GRAPH_WIDTH: int = PYGAME_CONSTANTS.GRAPH_WIDTH
+GRAPH_HEIGHT: int = PYGAME_CONSTANTS.GRAPH_HEIGHT
+GRAPH_THICKNESS: int = PYGAME_CONSTANTS.GRAPH_THICKNESS
+GRAPH_POSITION: tuple = (
+    PYGAME_CONSTANTS.GRAPH_PADDING,
+    HEIGHT - (GRAPH_HEIGHT + PYGAME_CONSTANTS.GRAPH_PADDING),
+)
+VECTOR_WIDTH: int = PYGAME_CONSTANTS.VECTOR_WIDTH
+TRAIL_WIDTH: int = PYGAME_CONSTANTS.TRAIL_WIDTH
+VECTOR_LENGTH_MULTI: int = PYGAME_CONSTANTS.VECTOR_LENGTH_MULTI
+BODY_TRAIL_FADE_INTERVAL: int = PYGAME_CONSTANTS.BODY_TRAIL_FADE_INTERVAL
+
+BACKGROUND_COLOR: tuple = COLORS.BACKGROUND_COLOR
+VELOCITY_VECTORS_COLOR: tuple = COLORS.VELOCITY_VECTORS_COLOR
+AXES_COLOR: tuple = COLORS.WHITE
+
+VELOCITY_LOSS_FACTOR: float = PHYSICS_CONSTANTS.VELOCITY_LOSS_FACTOR
+BARNES_HUT_MIN_BODIES: int = PHYSICS_CONSTANTS.BARNES_HUT_MIN_BODIES
+BARNES_HUT_MAX_DEPTH: int = PHYSICS_CONSTANTS.BARNES_HUT_MAX_DEPTH
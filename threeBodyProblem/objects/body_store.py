@@ -0,0 +1,225 @@
+"""The state of the bodies, kept as a structure of arrays."""
+
+import numpy as np
+
+from threeBodyProblem import physics
+from threeBodyProblem.constants import (
+    PHYSICS_CONSTANTS,
+    PYGAME_CONSTANTS,
+    BARNES_HUT_MIN_BODIES,
+    HEIGHT,
+    VELOCITY_LOSS_FACTOR,
+    WIDTH,
+)
+
+
+class BodyStore:
+    """
+    Abstraction representing the state of all the bodies, kept as
+    a structure of arrays, one entry per body, so that the physics can be
+    computed for all bodies at once. Responsible for advancing the state,
+    and recording the bodies' last positions.
+    """
+
+    def __init__(
+        self,
+        use_barnes_hut: bool = True,
+        barnes_hut_theta: float = PHYSICS_CONSTANTS.BARNES_HUT_THETA,
+    ):
+        self._use_barnes_hut = use_barnes_hut
+        self._barnes_hut_theta = barnes_hut_theta
+
+        self._init_state()
+        self._init_history()
+
+    # ============= INITIALIZATION ============= #
+
+    def _init_state(self) -> None:
+        """
+        Initialize the bodies' state. Single precision is plenty for
+        coordinates bounded by the window, and halves the memory traffic
+        of the physics.
+        """
+        self._pos_x = np.empty(0, dtype=np.float32)
+        self._pos_y = np.empty(0, dtype=np.float32)
+        self._vel_x = np.empty(0, dtype=np.float32)
+        self._vel_y = np.empty(0, dtype=np.float32)
+        self._mass = np.empty(0, dtype=np.float32)
+        self._radius = np.empty(0, dtype=np.float32)
+        self._g_constant = np.empty(0, dtype=np.float32)
+        self._is_stationary = np.empty(0, dtype=np.bool_)
+        # Scratch buffers for the compiled physics step
+        self._acc_x = np.empty(0, dtype=np.float32)
+        self._acc_y = np.empty(0, dtype=np.float32)
+
+    def _init_history(self) -> None:
+        """
+        Initialize the ring buffer of the bodies' last positions, one row
+        per body, all recorded at once after every step.
+        """
+        self._trail_buf = np.empty(
+            (0, PYGAME_CONSTANTS.BODY_TRAIL_LENGTH, 2), dtype=np.float32
+        )
+        self._trail_length = np.empty(0, dtype=np.intp)  # positions recorded
+        self._trail_head = 0  # where the next positions are recorded
+
+    # ================ PROPERTIES ================ #
+
+    @property
+    def pos_x(self) -> np.ndarray:
+        return self._pos_x
+
+    @property
+    def pos_y(self) -> np.ndarray:
+        return self._pos_y
+
+    @property
+    def vel_x(self) -> np.ndarray:
+        return self._vel_x
+
+    @property
+    def vel_y(self) -> np.ndarray:
+        return self._vel_y
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self._radius
+
+    # ============= PRIVATE METHODS ============= #
+
+    def _record_positions(self) -> None:
+        """
+        Record the bodies' current positions in the ring buffer, overwriting
+        the oldest ones. Nothing gets allocated.
+        """
+        trail_length = PYGAME_CONSTANTS.BODY_TRAIL_LENGTH
+        self._trail_buf[:, self._trail_head, 0] = self._pos_x
+        self._trail_buf[:, self._trail_head, 1] = self._pos_y
+        self._trail_head = (self._trail_head + 1) % trail_length
+        self._trail_length += 1
+        np.minimum(self._trail_length, trail_length, out=self._trail_length)
+
+    # ============== STATIC METHODS ============== #
+
+    @staticmethod
+    def _append(array: np.ndarray, value: float) -> np.ndarray:
+        """
+        Return a copy of the array with the value appended, keeping
+        the array's dtype.
+
+        Args:
+            array(np.ndarray): the array to append to
+            value(float): the value to append
+
+        Returns:
+            np.ndarray: the extended array
+        """
+        return np.append(array, np.asarray(value, dtype=array.dtype))
+
+    # ============= PUBLIC METHODS =============== #
+
+    def get_trail(self, index: int, count: int | None = None) -> np.ndarray:
+        """
+        Return the last positions recorded of the body, oldest first. Unless
+        they wrap around the end of the ring buffer, they are a view on it,
+        and must not be modified.
+
+        Args:
+            index(int): the index of the body
+            count(int | None): how many positions at most, all by default
+
+        Returns:
+            np.ndarray: the positions, one (x, y) row each
+        """
+        length = self._trail_length[index]
+        if count is not None:
+            length = min(length, count)
+        trail = self._trail_buf[index]
+        start = self._trail_head - length
+        if start >= 0:
+            return trail[start : self._trail_head]
+        return np.concatenate((trail[start:], trail[: self._trail_head]))
+
+    def add(
+        self,
+        mass: float,
+        radius: float,
+        init_x: int,
+        init_y: int,
+        init_vector: list[float],
+        is_stationary: bool = False,
+        g_constant: float = PHYSICS_CONSTANTS.GRAVITATIONAL_CONSTANT,
+    ) -> int:
+        """
+        Add a body's state to the store.
+
+        Args:
+            mass(float): the mass of the body
+            radius(float): the radius of the body
+            init_x(int): the initial x coordinate of the body
+            init_y(int): the initial y coordinate of the body
+            init_vector(list[float]): the initial velocity vector of the body
+            is_stationary(bool): whether the body is stationary or not
+            g_constant(float): the gravitational constant affecting the body
+
+        Returns:
+            int: the index of the body's entry
+        """
+        self._pos_x = self._append(self._pos_x, init_x)
+        self._pos_y = self._append(self._pos_y, init_y)
+        self._vel_x = self._append(self._vel_x, init_vector[0])
+        self._vel_y = self._append(self._vel_y, init_vector[1])
+        self._mass = self._append(self._mass, mass)
+        self._radius = self._append(self._radius, radius)
+        self._g_constant = self._append(self._g_constant, g_constant)
+        self._is_stationary = self._append(self._is_stationary, is_stationary)
+        self._acc_x = np.empty_like(self._pos_x)
+        self._acc_y = np.empty_like(self._pos_y)
+        row = np.empty((1,) + self._trail_buf.shape[1:], dtype=self._trail_buf.dtype)
+        self._trail_buf = np.concatenate((self._trail_buf, row))
+        self._trail_length = self._append(self._trail_length, 0)
+        return self._pos_x.shape[0] - 1
+
+    def step(self, dt: float = PHYSICS_CONSTANTS.TIME_STEP) -> None:
+        """
+        Advance the bodies' velocities and positions by one time step,
+        and record the new positions. Many bodies' accelerations are
+        approximated with a Barnes-Hut quadtree, unless disabled.
+
+        Args:
+            dt(float): the time step
+        """
+        state = (
+            self._pos_x,
+            self._pos_y,
+            self._vel_x,
+            self._vel_y,
+            self._mass,
+            self._radius,
+            self._g_constant,
+            self._is_stationary,
+            self._acc_x,
+            self._acc_y,
+            dt,
+        )
+        if self._use_barnes_hut and self._pos_x.shape[0] >= BARNES_HUT_MIN_BODIES:
+            physics.step_barnes_hut(*state, self._barnes_hut_theta)
+        else:
+            physics.step(*state)
+        self._record_positions()
+
+    def bounce_off_boundaries(self) -> None:
+        """
+        Bounce the bodies outside the boundaries of the simulation space
+        back, with reduced velocity.
+        """
+        physics.bounce_off_boundaries(
+            self._pos_x,
+            self._pos_y,
+            self._vel_x,
+            self._vel_y,
+            self._radius,
+            WIDTH,
+            HEIGHT,
+            VELOCITY_LOSS_FACTOR,
+        )
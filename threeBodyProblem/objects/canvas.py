@@ -1,29 +1,91 @@
 """An abstraction of canvas, on which the bodies interact with eachother."""
 
+import numpy as np
 import pygame
 
 from threeBodyProblem.objects.body import Body
-from threeBodyProblem.constants import COLORS, PHYSICS_CONSTANTS, PYGAME_CONSTANTS
+from threeBodyProblem.objects.body_store import BodyStore
+from threeBodyProblem.constants import (
+    COLORS,
+    PHYSICS_CONSTANTS,
+    PYGAME_CONSTANTS,
+    AXES_COLOR,
+    BACKGROUND_COLOR,
+    BODY_TRAIL_FADE_INTERVAL,
+    GRAPH_HEIGHT,
+    GRAPH_POSITION,
+    GRAPH_THICKNESS,
+    GRAPH_WIDTH,
+    VECTOR_LENGTH_MULTI,
+    VECTOR_WIDTH,
+    VELOCITY_VECTORS_COLOR,
+)
 
 
 class Canvas:
     """
     Abstraction representing the sky, on which the bodies interact.
-    Responsible for updating the bodies' positions and displaying other
-    features.
+    Responsible for keeping the bodies, updating their positions through
+    their store and displaying other features.
     """
 
-    def __init__(self, win: pygame.Surface):
+    def __init__(
+        self,
+        win: pygame.Surface,
+        use_barnes_hut: bool = True,
+        barnes_hut_theta: float = PHYSICS_CONSTANTS.BARNES_HUT_THETA,
+    ):
         self._win = win
-        self._bodies = []
+        # Surfaces without per-pixel alpha, like the window, can't be cleared
+        # to transparent, only to the background
+        self._clear_color = (
+            COLORS.TRANSPARENT
+            if win.get_flags() & pygame.SRCALPHA
+            else BACKGROUND_COLOR
+        )
+        self._use_barnes_hut = use_barnes_hut
+        self._barnes_hut_theta = barnes_hut_theta
         self._show_vectors = False
         self._show_trails = False
         self._show_graph = True
 
+        self._init_bodies()
+        self._init_sprites()
+        self._init_trails()
         self._init_graph()
+        self._init_dirty_rects()
 
     # ============= INITIALIZATION ============= #
 
+    def _init_bodies(self) -> None:
+        """
+        Initialize the bodies. Their state is kept by the store, the Body
+        objects are only views on it.
+        """
+        self._bodies = []
+        # Indices of the bodies drawn with the same sprite, by (radius, color)
+        self._sprite_groups: dict[tuple[int, tuple], np.ndarray] = {}
+        self._store = BodyStore(self._use_barnes_hut, self._barnes_hut_theta)
+        self._trail_new = 0  # positions not drawn on the trail yet
+
+    def _init_sprites(self) -> None:
+        """
+        Initialize the cache of body sprites, the surfaces with a filled
+        circle of the given radius and color, used to draw the bodies.
+        """
+        self._sprites: dict[tuple[int, tuple], pygame.Surface] = {}
+
+    def _init_trails(self) -> None:
+        """
+        Initialize the persistent surface of the bodies' trails. Every frame
+        only the newest segments are drawn on it, while the old ones fade out.
+        """
+        self._trail_win = pygame.Surface(
+            (PYGAME_CONSTANTS.WIDTH, PYGAME_CONSTANTS.HEIGHT), pygame.SRCALPHA
+        )
+        self._trail_frame = 0
+        self._trail_bounds = None
+
     def _init_graph(self) -> None:
         """
         Initialize the graph of the bodies' positions.
@@ -35,38 +97,185 @@ class Canvas:
             )
         )
 
+    def _init_dirty_rects(self) -> None:
+        """
+        Initialize the tracking of the canvas' areas changed between frames,
+        so that only those are cleared, redrawn and sent to the display.
+        """
+        self._last_rects: list[pygame.Rect] = []
+        self._redraw_all = True
+
     # ============= PRIVATE METHODS ============= #
 
-    def _plot_graph(self) -> None:
+    def _check_and_update_boundaries(self) -> None:
+        """
+        Checks if the bodies are within the boundaries of the simulation
+        space. The bodies outside the boundaries are bounced back with
+        reduced velocity.
+        """
+        self._store.bounce_off_boundaries()
+
+    def _clear_trails(self) -> None:
+        """
+        Clear the trail surface, and redraw the whole canvas.
+        """
+        self._trail_win.fill(COLORS.TRANSPARENT)
+        self._trail_bounds = None
+        self._redraw_all = True
+
+    def _redraw_trails(self) -> None:
+        """
+        Redraw the bodies' recorded trails on the cleared trail surface,
+        faded as if they had been drawn over time. The oldest segments of
+        all bodies come first, so the newer ones are drawn over them.
+        """
+        for age in reversed(
+            range(0, PYGAME_CONSTANTS.BODY_TRAIL_LENGTH, BODY_TRAIL_FADE_INTERVAL)
+        ):
+            for body in self._bodies:
+                rect = body.redraw_trail(self._trail_win, age)
+                if rect is not None:
+                    self._trail_bounds = (
+                        rect
+                        if self._trail_bounds is None
+                        else self._trail_bounds.union(rect)
+                    )
+
+    def _fade_trails(self) -> list[pygame.Rect]:
+        """
+        Fade out the trails, every few frames.
+
+        Returns:
+            list[pygame.Rect]: the areas of the trail surface changed
+        """
+        self._trail_frame += 1
+        if (
+            self._trail_frame % BODY_TRAIL_FADE_INTERVAL != 0
+            or self._trail_bounds is None
+        ):
+            return []
+        # Subtracting keeps no residue, the trails fade out completely
+        self._trail_win.fill((0, 0, 0, 1), special_flags=pygame.BLEND_RGBA_SUB)
+        return [self._trail_bounds]
+
+    def _draw_off_canvas(self) -> list[pygame.Rect]:
+        """
+        Draw the bodies' trails and their plots on the graph, on their own
+        surfaces, in a single pass over the bodies.
+
+        Returns:
+            list[pygame.Rect]: the areas of the trail surface changed
+        """
+        show_trails = self._show_trails
+        show_graph = self._show_graph
+        trail_win = self._trail_win
+        graph_win = self._graph_win
+
+        changed_rects = self._fade_trails() if show_trails else []
+        if show_graph:
+            self._draw_graph_axes()
+
+        new_positions = self._trail_new
+        if show_trails:
+            self._trail_new = 0
+
+        for body in self._bodies:
+            if show_trails:
+                rect = body.draw_trail(trail_win, new_positions)
+                if rect is not None:
+                    changed_rects.append(rect)
+                    self._trail_bounds = (
+                        rect
+                        if self._trail_bounds is None
+                        else self._trail_bounds.union(rect)
+                    )
+            if show_graph:
+                body.plot_on_graph(graph_win)
+        return changed_rects
+
+    def _get_sprite(self, radius: int, color: tuple) -> pygame.Surface:
+        """
+        Return the sprite of a body of the given radius and color, drawing
+        it on the first use.
+
+        Args:
+            radius(int): the radius of the body
+            color(tuple): the color of the body
+
+        Returns:
+            pygame.Surface: the sprite, centered on the body's position
         """
-        Plot the graph of the bodies' positions.
+        key = (radius, color)
+        if key not in self._sprites:
+            size = 2 * radius + 1
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self._sprites[key] = sprite
+        return self._sprites[key]
+
+    def _draw_bodies(self) -> list[pygame.Rect]:
+        """
+        Draw all the bodies on the canvas, by blitting their cached sprites.
+        The bodies sharing a sprite are blitted in a single call.
+
+        Returns:
+            list[pygame.Rect]: the areas drawn on
         """
-        self._graph_win.fill(COLORS.BACKGROUND_COLOR)
+        rects = []
+        for (radius, color), indices in self._sprite_groups.items():
+            sprite = self._get_sprite(radius, color)
+            corner_x = np.rint(self._store.pos_x[indices]).astype(np.intp) - radius
+            corner_y = np.rint(self._store.pos_y[indices]).astype(np.intp) - radius
+            rects += self._win.blits(
+                [
+                    (sprite, corner)
+                    for corner in zip(corner_x.tolist(), corner_y.tolist())
+                ]
+            )
+        return rects
+
+    def _draw_velocity_vectors(self) -> list[pygame.Rect]:
+        """
+        Draw all the bodies' velocity vectors on the canvas, with their
+        endpoints computed from the store's arrays at once.
+
+        Returns:
+            list[pygame.Rect]: the areas drawn on
+        """
+        pos_x = self._store.pos_x.astype(np.float64)
+        pos_y = self._store.pos_y.astype(np.float64)
+        end_x = pos_x + VECTOR_LENGTH_MULTI * self._store.vel_x.astype(np.float64)
+        end_y = pos_y + VECTOR_LENGTH_MULTI * self._store.vel_y.astype(np.float64)
+
+        draw_line = pygame.draw.line
+        win = self._win
+        return [
+            draw_line(win, VELOCITY_VECTORS_COLOR, start, end, VECTOR_WIDTH)
+            for start, end in zip(
+                zip(pos_x.tolist(), pos_y.tolist()),
+                zip(end_x.tolist(), end_y.tolist()),
+            )
+        ]
+
+    def _draw_graph_axes(self) -> None:
+        """
+        Clear the graph of the bodies' positions, and draw its axes.
+        """
+        self._graph_win.fill(BACKGROUND_COLOR)
         # Draw the axes
         pygame.draw.line(
             self._graph_win,
-            COLORS.WHITE,
-            (0, PYGAME_CONSTANTS.GRAPH_HEIGHT),
+            AXES_COLOR,
+            (0, GRAPH_HEIGHT),
             (0, 0),
-            PYGAME_CONSTANTS.GRAPH_THICKNESS,
+            GRAPH_THICKNESS,
         )
         pygame.draw.line(
             self._graph_win,
-            COLORS.WHITE,
-            (0, PYGAME_CONSTANTS.GRAPH_HEIGHT),
-            (PYGAME_CONSTANTS.GRAPH_WIDTH, PYGAME_CONSTANTS.GRAPH_HEIGHT),
-            PYGAME_CONSTANTS.GRAPH_THICKNESS,
-        )
-        # Draw the trails
-        for body in self._bodies:
-            body.plot_on_graph(self._graph_win)
-        self._win.blit(
-            self._graph_win,
-            (
-                PYGAME_CONSTANTS.GRAPH_PADDING,
-                PYGAME_CONSTANTS.HEIGHT
-                - (PYGAME_CONSTANTS.GRAPH_HEIGHT + PYGAME_CONSTANTS.GRAPH_PADDING),
-            ),
+            AXES_COLOR,
+            (0, GRAPH_HEIGHT),
+            (GRAPH_WIDTH, GRAPH_HEIGHT),
+            GRAPH_THICKNESS,
         )
 
     # ============= PUBLIC METHODS =============== #
@@ -76,36 +285,68 @@ class Canvas:
         Switch between displaying bodies' vectors and not doing that.
         """
         self._show_vectors = not self._show_vectors
+        self._redraw_all = True
 
     def toggle_draw_trails(self) -> None:
         """
         Switch between drawing trails and not doing that.
         """
         self._show_trails = not self._show_trails
+        self._trail_new = 0
+        self._clear_trails()
+        if self._show_trails:
+            self._redraw_trails()
 
     def toggle_plot_graph(self) -> None:
         """
         Switch between plotting the graph and not doing that.
         """
         self._show_graph = not self._show_graph
+        self._redraw_all = True
+
+    def redraw(self) -> None:
+        """
+        Redraw the whole canvas in the next frame, not just its changed areas.
+        """
+        self._redraw_all = True
 
     def reset(self) -> None:
         """
         Reset the canvas.
         """
-        self._bodies = []
+        self._init_bodies()
+        self._clear_trails()
 
-    def draw(self) -> None:
+    def draw(self) -> list[pygame.Rect]:
         """
-        Draw the canvas.
+        Draw the canvas. Only the areas changed since the last frame are
+        cleared and redrawn, the rest of the canvas is left as it was.
+
+        Returns:
+            list[pygame.Rect]: the areas of the canvas changed
         """
-        self._win.fill(color=COLORS.TRANSPARENT)
+        # Where the bodies and their vectors were in the last frame
+        dirty_rects = self._last_rects
+        if self._redraw_all:
+            dirty_rects = [self._win.get_rect()]
+            self._redraw_all = False
 
-        for body in self._bodies:
-            body.draw(self._show_vectors, self._show_trails)
+        dirty_rects += self._draw_off_canvas()
+
+        for rect in dirty_rects:
+            self._win.fill(self._clear_color, rect)
+            if self._show_trails:
+                self._win.blit(self._trail_win, rect, area=rect)
+
+        # Drawn over the cleared areas, so only need clearing in the next frame
+        self._last_rects = self._draw_bodies()
+        if self._show_vectors:
+            self._last_rects += self._draw_velocity_vectors()
 
         if self._show_graph:
-            self._plot_graph()
+            self._last_rects.append(self._win.blit(self._graph_win, GRAPH_POSITION))
+
+        return dirty_rects + self._last_rects
 
     def add_body(
         self,
@@ -118,37 +359,43 @@ class Canvas:
         g_constant: float = PHYSICS_CONSTANTS.GRAVITATIONAL_CONSTANT,
     ) -> None:
         """
-        Initialize and add a body to the canvas.
+        Add a body's state to the store, and initialize its view.
 
         Args:
-            win(pygame.Surface): the window on which the body is drawn
+            number(int): the number of the body, deciding its color
             mass(float): the mass of the body
             init_x(int): the initial x coordinate of the body
             init_y(int): the initial y coordinate of the body
             init_vector(list[float]): the initial velocity vector of the body
             is_stationary(bool): whether the body is stationary or not
+            g_constant(float): the gravitational constant affecting the body
         """
-        self._bodies.append(
-            Body(
-                number,
-                self._win,
-                mass,
-                init_x,
-                init_y,
-                init_vector,
-                is_stationary,
-                g_constant,
-            )
+        index = self._store.add(
+            mass,
+            Body.calculate_radius(mass),
+            init_x,
+            init_y,
+            init_vector,
+            is_stationary,
+            g_constant,
         )
+        body = Body(number, self._store, index)
+        self._bodies.append(body)
 
-    def update(self) -> None:
+        key = (int(self._store.radius[index]), body.color)
+        self._sprite_groups[key] = np.append(
+            self._sprite_groups.get(key, np.empty(0, dtype=np.intp)), index
+        )
+
+    def update(self, dt: float = PHYSICS_CONSTANTS.TIME_STEP) -> None:
         """
-        Update the positions of the bodies and draw them.
+        Update the velocities and positions of the bodies by one time step.
+
+        Args:
+            dt(float): the time step
         """
-        for body1 in self._bodies:
-            for body2 in self._bodies:
-                if body1 == body2:
-                    continue
-                body1.calculate_impact_on(body2)
+        self._store.step(dt)
+
+        # self._check_and_update_boundaries()
 
-            body1.update()
+        self._trail_new += 1
@@ -0,0 +1,223 @@
+"""
+A Barnes-Hut quadtree, approximating the gravity of distant groups of bodies
+by their centre of mass.
+
+The tree is stored in flat arrays, one entry per node, so that it can be
+built and traversed by compiled code. The children of a node are always
+allocated together, after their parent.
+"""
+
+import numpy as np
+from numba import njit
+
+from threeBodyProblem.constants import BARNES_HUT_MAX_DEPTH
+
+_NO_NODE: int = -1
+
+
+@njit(cache=True)
+def _grow(array: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    Return a copy of the array, enlarged along its first axis.
+    """
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[: array.shape[0]] = array
+    return grown
+
+
+@njit(cache=True)
+def build(x: np.ndarray, y: np.ndarray, m: np.ndarray) -> tuple:
+    """
+    Build the quadtree of the bodies.
+
+    Every leaf keeps a linked list of the bodies inside it (more than one
+    only when the maximum depth is reached), and every node the total mass
+    and the centre of mass of the bodies inside it.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        m(np.ndarray): the masses of the bodies
+
+    Returns:
+        tuple: the children (node, quadrant) of every node, the first body
+               of every leaf, the next body in the leaf of every body, and
+               every node's half width, mass and centre of mass coordinates
+    """
+    n = x.shape[0]
+    capacity = 4 * n + 1
+    children = np.full((capacity, 4), _NO_NODE, dtype=np.int64)
+    first_body = np.full(capacity, _NO_NODE, dtype=np.int64)
+    center_x = np.empty(capacity, dtype=np.float64)
+    center_y = np.empty(capacity, dtype=np.float64)
+    half_width = np.empty(capacity, dtype=np.float64)
+    depth = np.zeros(capacity, dtype=np.int64)
+    next_body = np.full(n, _NO_NODE, dtype=np.int64)
+
+    # The root is the bounding square of all the bodies
+    x_min, x_max = x.min(), x.max()
+    y_min, y_max = y.min(), y.max()
+    center_x[0] = (x_min + x_max) / 2
+    center_y[0] = (y_min + y_max) / 2
+    half_width[0] = max(x_max - x_min, y_max - y_min) / 2 + 1.0
+    count = 1
+
+    for i in range(n):
+        node = 0
+        while True:
+            if children[node, 0] != _NO_NODE:
+                # Internal node, descend into the body's quadrant
+                quadrant = (x[i] >= center_x[node]) + 2 * (y[i] >= center_y[node])
+                node = children[node, quadrant]
+                continue
+            if first_body[node] == _NO_NODE or depth[node] >= BARNES_HUT_MAX_DEPTH:
+                next_body[i] = first_body[node]
+                first_body[node] = i
+                break
+
+            # Split the leaf, moving its body into one of the new children
+            if count + 4 > capacity:
+                capacity *= 2
+                children = _grow(children, capacity)
+                children[count:] = _NO_NODE
+                first_body = _grow(first_body, capacity)
+                first_body[count:] = _NO_NODE
+                center_x = _grow(center_x, capacity)
+                center_y = _grow(center_y, capacity)
+                half_width = _grow(half_width, capacity)
+                depth = _grow(depth, capacity)
+            quarter = half_width[node] / 2
+            for quadrant in range(4):
+                child = count + quadrant
+                children[node, quadrant] = child
+                center_x[child] = center_x[node] + (
+                    quarter if quadrant & 1 else -quarter
+                )
+                center_y[child] = center_y[node] + (
+                    quarter if quadrant & 2 else -quarter
+                )
+                half_width[child] = quarter
+                depth[child] = depth[node] + 1
+            count += 4
+
+            j = first_body[node]
+            first_body[node] = _NO_NODE
+            quadrant = (x[j] >= center_x[node]) + 2 * (y[j] >= center_y[node])
+            first_body[children[node, quadrant]] = j
+
+    # Children come after their parents, so a reverse sweep aggregates
+    # the masses bottom-up
+    mass = np.zeros(count, dtype=np.float64)
+    com_x = np.zeros(count, dtype=np.float64)
+    com_y = np.zeros(count, dtype=np.float64)
+    for node in range(count - 1, -1, -1):
+        if children[node, 0] == _NO_NODE:
+            j = first_body[node]
+            while j != _NO_NODE:
+                mass[node] += m[j]
+                com_x[node] += m[j] * x[j]
+                com_y[node] += m[j] * y[j]
+                j = next_body[j]
+        else:
+            for quadrant in range(4):
+                child = children[node, quadrant]
+                mass[node] += mass[child]
+                com_x[node] += mass[child] * com_x[child]
+                com_y[node] += mass[child] * com_y[child]
+        if mass[node] > 0:
+            com_x[node] /= mass[node]
+            com_y[node] /= mass[node]
+
+    return (
+        children[:count],
+        first_body[:count],
+        next_body,
+        half_width[:count],
+        mass,
+        com_x,
+        com_y,
+    )
+
+
+# Compiled lazily, on the first call, as only many bodies take the tree
+@njit(fastmath=True, error_model="numpy", cache=True)
+def compute_accelerations(
+    x: np.ndarray,
+    y: np.ndarray,
+    m: np.ndarray,
+    r: np.ndarray,
+    g: np.ndarray,
+    stationary: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    theta: float,
+) -> None:
+    """
+    Calculate the gravitational acceleration exerted on every body by all
+    the other bodies, using the Barnes-Hut approximation: a node seen at
+    an angle smaller than theta (width / distance < theta) acts as a single
+    body placed in its centre of mass.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        m(np.ndarray): the masses of the bodies
+        r(np.ndarray): the radii of the bodies
+        g(np.ndarray): the gravitational constants affecting the bodies
+        stationary(np.ndarray): whether the bodies are stationary or not
+        ax(np.ndarray): output, the x accelerations of the bodies
+        ay(np.ndarray): output, the y accelerations of the bodies
+        theta(float): the opening angle, 0 meaning the exact sum
+    """
+    children, first_body, next_body, half_width, mass, com_x, com_y = build(x, y, m)
+    theta2 = theta * theta
+    r_max = r.max()
+    # The nodes left to visit, reused for every body
+    stack = np.empty(3 * BARNES_HUT_MAX_DEPTH + 4, dtype=np.int64)
+
+    for i in range(x.shape[0]):
+        axi = 0.0
+        ayi = 0.0
+        if not stationary[i]:
+            # Stationary bodies aren't affected by other bodies
+            stack[0] = 0
+            size = 1
+            while size > 0:
+                size -= 1
+                node = stack[size]
+                if mass[node] == 0:
+                    continue
+                if children[node, 0] == _NO_NODE:
+                    # Leaf, interact with its bodies directly
+                    j = first_body[node]
+                    while j != _NO_NODE:
+                        dx = x[i] - x[j]
+                        dy = y[i] - y[j]
+                        d2 = dx * dx + dy * dy
+                        r_sum = r[i] + r[j]
+                        if d2 > r_sum * r_sum:
+                            inv_d = 1.0 / np.sqrt(d2)
+                            coeff = m[j] * inv_d * inv_d * inv_d
+                            axi -= coeff * dx
+                            ayi -= coeff * dy
+                        j = next_body[j]
+                    continue
+                dx = x[i] - com_x[node]
+                dy = y[i] - com_y[node]
+                d2 = dx * dx + dy * dy
+                width = 2 * half_width[node]
+                # None of the node's bodies may be close enough to the
+                # body for their impact to be skipped
+                reach = r[i] + r_max + 1.5 * width
+                if width * width < theta2 * d2 and d2 > reach * reach:
+                    # Far enough, use the node's pseudo-body
+                    inv_d = 1.0 / np.sqrt(d2)
+                    coeff = mass[node] * inv_d * inv_d * inv_d
+                    axi -= coeff * dx
+                    ayi -= coeff * dy
+                else:
+                    for quadrant in range(4):
+                        stack[size] = children[node, quadrant]
+                        size += 1
+        ax[i] = g[i] * axi
+        ay[i] = g[i] * ayi
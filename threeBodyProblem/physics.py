@@ -0,0 +1,331 @@
+"""Compiled kernels integrating the bodies' state kept by the canvas."""
+
+import numpy as np
+from numba import njit
+
+from threeBodyProblem.objects import quadtree
+
+# Signatures of the kernels, compiled eagerly. The arrays are declared
+# C-contiguous so the loops run without stride arithmetic, and the numpy
+# error model drops the division checks. The state is single precision,
+# which fits twice as many bodies in every SIMD register. The kernels are
+# serial, as threading the loops over a simulation's few bodies would cost
+# more than it saves.
+_ACCELERATIONS_SIGNATURE = (
+    "void(f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], b1[::1], f4[::1], f4[::1])"
+)
+_DRIFT_SIGNATURE = "void(f4[::1], f4[::1], f4[::1], f4[::1], f4)"
+_KICK_DRIFT_SIGNATURE = "void(f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], f4)"
+_STEP_SIGNATURE = (
+    "void(f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], f4[::1], b1[::1],"
+    " f4[::1], f4[::1], f4)"
+)
+
+
+@njit(_ACCELERATIONS_SIGNATURE, fastmath=True, error_model="numpy", cache=True)
+def compute_accelerations(
+    x: np.ndarray,
+    y: np.ndarray,
+    m: np.ndarray,
+    r: np.ndarray,
+    g: np.ndarray,
+    stationary: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+) -> None:
+    """
+    Calculate the gravitational acceleration exerted on every body by all
+    the other bodies, from the formula a = G * M / d^2, in a single pass
+    without any temporary arrays.
+
+    The inner loop only reads the other bodies and has no branches, so it
+    gets compiled to SIMD instructions. That outruns visiting each pair once
+    (Newton's third law), whose scattered writes can't be vectorized.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        m(np.ndarray): the masses of the bodies
+        r(np.ndarray): the radii of the bodies
+        g(np.ndarray): the gravitational constants affecting the bodies
+        stationary(np.ndarray): whether the bodies are stationary or not
+        ax(np.ndarray): output, the x accelerations of the bodies
+        ay(np.ndarray): output, the y accelerations of the bodies
+    """
+    n = x.shape[0]
+    for i in range(n):
+        if stationary[i]:
+            # Stationary bodies aren't affected by other bodies
+            ax[i] = 0.0
+            ay[i] = 0.0
+            continue
+        xi = x[i]
+        yi = y[i]
+        ri = r[i]
+        # Single precision literals, so that nothing gets promoted to double
+        axi = np.float32(0.0)
+        ayi = np.float32(0.0)
+        for j in range(n):
+            dx = xi - x[j]
+            dy = yi - y[j]
+            d2 = dx * dx + dy * dy
+            r_sum = ri + r[j]
+            # So the forces won't get extreme, when the bodies get close.
+            # This also skips the impact of the body on itself.
+            far = d2 > r_sum * r_sum
+            # 1 / d^3 from a single square root, cubed by multiplying
+            inv_d = np.float32(1.0) / np.sqrt(d2 if far else np.float32(1.0))
+            coeff = m[j] * inv_d * inv_d * inv_d if far else np.float32(0.0)
+            axi -= coeff * dx
+            ayi -= coeff * dy
+        ax[i] = g[i] * axi
+        ay[i] = g[i] * ayi
+
+
+@njit("f4(f4, f4, f4)", fastmath=True, error_model="numpy", cache=True)
+def _inverse_cube(dx: float, dy: float, r_sum: float) -> float:
+    """
+    Return 1 / d^3 for the distance between two bodies, or 0 when their
+    radii overlap, so the forces won't get extreme when they get close.
+
+    Args:
+        dx(float): the difference of the bodies' x coordinates
+        dy(float): the difference of the bodies' y coordinates
+        r_sum(float): the sum of the bodies' radii
+
+    Returns:
+        float: the inverse cube of the distance
+    """
+    d2 = dx * dx + dy * dy
+    if d2 > r_sum * r_sum:
+        inv_d = np.float32(1.0) / np.sqrt(d2)
+        return inv_d * inv_d * inv_d
+    return np.float32(0.0)
+
+
+@njit(_ACCELERATIONS_SIGNATURE, fastmath=True, error_model="numpy", cache=True)
+def compute_accelerations_n3(
+    x: np.ndarray,
+    y: np.ndarray,
+    m: np.ndarray,
+    r: np.ndarray,
+    g: np.ndarray,
+    stationary: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+) -> None:
+    """
+    Calculate the gravitational accelerations of exactly three bodies, the
+    default configuration. The three pairs are written out, so there are no
+    loops, and each pair's distance is computed once for both its bodies.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        m(np.ndarray): the masses of the bodies
+        r(np.ndarray): the radii of the bodies
+        g(np.ndarray): the gravitational constants affecting the bodies
+        stationary(np.ndarray): whether the bodies are stationary or not
+        ax(np.ndarray): output, the x accelerations of the bodies
+        ay(np.ndarray): output, the y accelerations of the bodies
+    """
+    dx01 = x[0] - x[1]
+    dy01 = y[0] - y[1]
+    dx02 = x[0] - x[2]
+    dy02 = y[0] - y[2]
+    dx12 = x[1] - x[2]
+    dy12 = y[1] - y[2]
+    k01 = _inverse_cube(dx01, dy01, r[0] + r[1])
+    k02 = _inverse_cube(dx02, dy02, r[0] + r[2])
+    k12 = _inverse_cube(dx12, dy12, r[1] + r[2])
+
+    ax[0] = -m[1] * k01 * dx01 - m[2] * k02 * dx02
+    ay[0] = -m[1] * k01 * dy01 - m[2] * k02 * dy02
+    ax[1] = m[0] * k01 * dx01 - m[2] * k12 * dx12
+    ay[1] = m[0] * k01 * dy01 - m[2] * k12 * dy12
+    ax[2] = m[0] * k02 * dx02 + m[1] * k12 * dx12
+    ay[2] = m[0] * k02 * dy02 + m[1] * k12 * dy12
+
+    for i in range(3):
+        if stationary[i]:
+            # Stationary bodies aren't affected by other bodies
+            ax[i] = 0.0
+            ay[i] = 0.0
+        else:
+            ax[i] *= g[i]
+            ay[i] *= g[i]
+
+
+@njit(_DRIFT_SIGNATURE, fastmath=True, error_model="numpy", cache=True)
+def _drift(
+    x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray, dt: float
+) -> None:
+    """
+    Move the bodies along their velocities in place.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        vx(np.ndarray): the x velocities of the bodies
+        vy(np.ndarray): the y velocities of the bodies
+        dt(float): the time to move the bodies by
+    """
+    for i in range(x.shape[0]):
+        x[i] += vx[i] * dt
+        y[i] += vy[i] * dt
+
+
+@njit(_KICK_DRIFT_SIGNATURE, fastmath=True, error_model="numpy", cache=True)
+def _kick_drift(
+    x: np.ndarray,
+    y: np.ndarray,
+    vx: np.ndarray,
+    vy: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    dt: float,
+) -> None:
+    """
+    Update the bodies' velocities with their accelerations over a whole
+    time step, then move the bodies along them by half of it, in place.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        vx(np.ndarray): the x velocities of the bodies
+        vy(np.ndarray): the y velocities of the bodies
+        ax(np.ndarray): the x accelerations of the bodies
+        ay(np.ndarray): the y accelerations of the bodies
+        dt(float): the time step
+    """
+    half_dt = np.float32(0.5) * dt
+    for i in range(x.shape[0]):
+        vx[i] += ax[i] * dt
+        vy[i] += ay[i] * dt
+        x[i] += vx[i] * half_dt
+        y[i] += vy[i] * half_dt
+
+
+@njit(_STEP_SIGNATURE, fastmath=True, error_model="numpy", cache=True)
+def step(
+    x: np.ndarray,
+    y: np.ndarray,
+    vx: np.ndarray,
+    vy: np.ndarray,
+    m: np.ndarray,
+    r: np.ndarray,
+    g: np.ndarray,
+    stationary: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    dt: float,
+) -> None:
+    """
+    Advance the bodies' state by one time step in place, with the leapfrog
+    (drift-kick-drift) integrator: move the bodies by half a step, update
+    the velocities with the gravitational accelerations there, and move the
+    bodies by the other half. It is symplectic, so the energy doesn't drift
+    away over long runs, and needs just one evaluation of the accelerations
+    per step. The accelerations are summed directly, with an unrolled kernel
+    for the default three bodies.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        vx(np.ndarray): the x velocities of the bodies
+        vy(np.ndarray): the y velocities of the bodies
+        m(np.ndarray): the masses of the bodies
+        r(np.ndarray): the radii of the bodies
+        g(np.ndarray): the gravitational constants affecting the bodies
+        stationary(np.ndarray): whether the bodies are stationary or not
+        ax(np.ndarray): scratch buffer for the x accelerations
+        ay(np.ndarray): scratch buffer for the y accelerations
+        dt(float): the time step
+    """
+    _drift(x, y, vx, vy, np.float32(0.5) * dt)
+    if x.shape[0] == 3:
+        compute_accelerations_n3(x, y, m, r, g, stationary, ax, ay)
+    else:
+        compute_accelerations(x, y, m, r, g, stationary, ax, ay)
+    _kick_drift(x, y, vx, vy, ax, ay, dt)
+
+
+# Compiled lazily, on the first call, as only states with many bodies,
+# which the simulations never create, take the Barnes-Hut approximation
+@njit(fastmath=True, error_model="numpy", cache=True)
+def step_barnes_hut(
+    x: np.ndarray,
+    y: np.ndarray,
+    vx: np.ndarray,
+    vy: np.ndarray,
+    m: np.ndarray,
+    r: np.ndarray,
+    g: np.ndarray,
+    stationary: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    dt: float,
+    theta: float,
+) -> None:
+    """
+    Advance the bodies' state by one time step in place, like step, with
+    the accelerations approximated by a Barnes-Hut quadtree.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        vx(np.ndarray): the x velocities of the bodies
+        vy(np.ndarray): the y velocities of the bodies
+        m(np.ndarray): the masses of the bodies
+        r(np.ndarray): the radii of the bodies
+        g(np.ndarray): the gravitational constants affecting the bodies
+        stationary(np.ndarray): whether the bodies are stationary or not
+        ax(np.ndarray): scratch buffer for the x accelerations
+        ay(np.ndarray): scratch buffer for the y accelerations
+        dt(float): the time step
+        theta(float): the opening angle of the Barnes-Hut approximation
+    """
+    _drift(x, y, vx, vy, 0.5 * dt)
+    quadtree.compute_accelerations(x, y, m, r, g, stationary, ax, ay, theta)
+    _kick_drift(x, y, vx, vy, ax, ay, dt)
+
+
+# Compiled lazily, on the first call, as the bounce is disabled for now
+@njit(fastmath=True, error_model="numpy", cache=True)
+def bounce_off_boundaries(
+    x: np.ndarray,
+    y: np.ndarray,
+    vx: np.ndarray,
+    vy: np.ndarray,
+    r: np.ndarray,
+    width: float,
+    height: float,
+    loss: float,
+) -> None:
+    """
+    Bounce the bodies outside the boundaries of the simulation space back
+    in place, with reduced velocity, in a single pass without any masks.
+
+    Args:
+        x(np.ndarray): the x coordinates of the bodies
+        y(np.ndarray): the y coordinates of the bodies
+        vx(np.ndarray): the x velocities of the bodies
+        vy(np.ndarray): the y velocities of the bodies
+        r(np.ndarray): the radii of the bodies
+        width(float): the width of the simulation space
+        height(float): the height of the simulation space
+        loss(float): the fraction of the velocity kept after a bounce
+    """
+    for i in range(x.shape[0]):
+        if x[i] < r[i]:
+            x[i] = 1 + r[i]
+            vx[i] *= -loss
+        elif x[i] > width - r[i]:
+            x[i] = width - r[i]
+            vx[i] *= -loss
+        if y[i] < r[i]:
+            y[i] = 1 + r[i]
+            vy[i] *= -loss
+        elif y[i] > height - r[i]:
+            y[i] = height - r[i]
+            vy[i] *= -loss
@@ -1,9 +1,8 @@
-import math
 import pygame
 
 from threeBodyProblem.simulation_params import SimulationParams
 from threeBodyProblem.objects.canvas import Canvas
-from threeBodyProblem.constants import PYGAME_CONSTANTS, COLORS, PHYSICS_CONSTANTS
+from threeBodyProblem.constants import PYGAME_CONSTANTS, PHYSICS_CONSTANTS
 
 
 class Simulation:
@@ -18,33 +17,51 @@ class Simulation:
         win: pygame.Surface,
         clock: pygame.time.Clock,
         simulation_params: SimulationParams,
+        draw_on_window: bool = False,
     ) -> None:
         self._win = win
         self._clock = clock
         self._params = simulation_params
+        self._draw_on_window = draw_on_window
 
         self._init_surface()
         self._init_canvas()
+        self._init_time()
 
     def _init_surface(self) -> None:
         """
-        Initializes pygame stuff.
+        Initializes pygame stuff. A simulation drawing on the window
+        needs no surface of its own, nor blending it onto the window.
+
+        Otherwise the surface has per-pixel alpha, so the cleared areas are
+        transparent, and is blended with the simulation's alpha on top.
         """
+        if self._draw_on_window:
+            self._surface = self._win
+            return
         self._surface = pygame.Surface(
-            (PYGAME_CONSTANTS.WIDTH, PYGAME_CONSTANTS.HEIGHT),
-            pygame.SRCALPHA,
-        )
-        self._surface.set_colorkey(COLORS.BACKGROUND_COLOR)
+            (PYGAME_CONSTANTS.WIDTH, PYGAME_CONSTANTS.HEIGHT), pygame.SRCALPHA
+        ).convert_alpha()
         self._surface.set_alpha(self._params.alpha)
-        self._surface = self._surface.convert_alpha()
 
     def _init_canvas(self) -> None:
         """
         Initializes the canvas.
         """
-        self._canvas = Canvas(self._surface)
+        self._canvas = Canvas(
+            self._surface,
+            use_barnes_hut=self._params.use_barnes_hut,
+            barnes_hut_theta=self._params.barnes_hut_theta,
+        )
         self._init_bodies()
 
+    def _init_time(self) -> None:
+        """
+        Initializes the real time not yet simulated, carried over between
+        frames so that the physics runs at a fixed time step.
+        """
+        self._time_accumulator = 0.0
+
     def _init_bodies(self) -> None:
         """
         Initializes the bodies positions as equilateral triangle
@@ -52,7 +69,7 @@ class Simulation:
         """
         center_x = PYGAME_CONSTANTS.WIDTH / 2
         center_y = PYGAME_CONSTANTS.HEIGHT / 2
-        height = (math.sqrt(3) / 2) * self._params.body_distance
+        height = PHYSICS_CONSTANTS.SQRT3_OVER_2 * self._params.body_distance
 
         bodies_init_pos = [
             (center_x - self._params.body_distance / 2, center_y + height / 2),
@@ -81,12 +98,25 @@ class Simulation:
 
     # ================= PRIVATE METHODS =================== #
 
-    def _draw(self) -> None:
+    def _update(self) -> None:
         """
-        Draws all bodies on the canvas.
+        Runs as many fixed physics steps as the real time elapsed since
+        the last frame needs, independently of the frame rate.
         """
-        self._canvas.draw()
-        self._win.blit(self._surface, (0, 0))
+        time_step = self._params.time_step
+        # A longer time step is taken proportionally less often, so that
+        # the simulation keeps its pace
+        step_duration = time_step / (
+            PHYSICS_CONSTANTS.TIME_STEP * PHYSICS_CONSTANTS.STEPS_PER_SECOND
+        )
+        update = self._canvas.update
+        accumulator = self._time_accumulator + min(
+            self._clock.get_time() / 1000, PHYSICS_CONSTANTS.MAX_FRAME_TIME
+        )
+        while accumulator >= step_duration:
+            update(time_step)
+            accumulator -= step_duration
+        self._time_accumulator = accumulator
 
     # ================== PUBLIC METHODS ================== #
 
@@ -108,16 +138,41 @@ class Simulation:
         """
         self._canvas.toggle_plot_graph()
 
+    def redraw(self) -> None:
+        """
+        Redraw the whole canvas in the next frame.
+        """
+        self._canvas.redraw()
+
     def reset(self) -> None:
         """
         Reset the canvas.
         """
         self._canvas.reset()
+        self._init_time()
         self._init_bodies()
 
-    def run(self) -> None:
+    def step_physics(self) -> None:
+        """
+        Advances the simulation's physics by the time elapsed since the last
+        frame.
+        """
+        self._update()
+
+    def draw(self) -> list[pygame.Rect]:
+        """
+        Draws all bodies on the canvas.
+
+        Returns:
+            list[pygame.Rect]: the areas of the canvas changed
         """
-        Runs the simulation.
+        return self._canvas.draw()
+
+    def blit(self, rect: pygame.Rect) -> None:
+        """
+        Blits the given area of the canvas on the window.
+
+        Args:
+            rect(pygame.Rect): the area to blit
         """
-        self._canvas.update()
-        self._draw()
+        self._win.blit(self._surface, rect, area=rect)
@@ -5,7 +5,30 @@ from threeBodyProblem.constants import PHYSICS_CONSTANTS
 
 @dataclass
 class SimulationParams:
+    """
+    Parameters of a simulation.
+
+    A time_step longer than TIME_STEP takes proportionally fewer steps, to
+    keep the simulation's pace. As the frames aren't interpolated between
+    steps, the bodies then move less often, and less smoothly.
+
+    The Barnes-Hut approximation only replaces the direct sum from
+    BARNES_HUT_MIN_BODIES bodies up. With the three bodies of a simulation,
+    use_barnes_hut and barnes_hut_theta have no effect.
+    """
+
     alpha: int = 255
     body_distance: float = PHYSICS_CONSTANTS.DEFAULT_BODY_DISTANCE
     mass: float = PHYSICS_CONSTANTS.DEFAULT_BODY_MASS
     g_constant: float = PHYSICS_CONSTANTS.GRAVITATIONAL_CONSTANT
+    time_step: float = PHYSICS_CONSTANTS.TIME_STEP
+    use_barnes_hut: bool = True
+    barnes_hut_theta: float = PHYSICS_CONSTANTS.BARNES_HUT_THETA
+
+    def __post_init__(self) -> None:
+        """
+        Rejects a time step the simulation can't advance by, as the
+        fixed-step loop would never catch up with the real time.
+        """
+        if self.time_step <= 0:
+            raise ValueError(f"time_step must be positive, got {self.time_step}")